@@ -1,12 +1,47 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import folium
-from streamlit_folium import folium_static
+from folium.plugins import FastMarkerCluster
+import asyncio
+import httpx
 import requests
+from requests.adapters import HTTPAdapter, Retry
 import configparser
-import polyline
+import diskcache
+import gzip
+import urllib.parse
+import numpy as np
+import orjson
+import functools
 import pandas as pd
+import threading
+import time
 from datetime import datetime, timedelta
 
+USER_AGENT = 'Aisin-Internship-CarNavApp/1.0 (anothay555@gmail.com)'
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+
+# Shared session so all API calls reuse pooled keep-alive connections
+# instead of paying a fresh TCP+TLS handshake per request.
+SESSION = requests.Session()
+SESSION.headers.update({
+    'User-Agent': USER_AGENT,
+    # requests negotiates this by default; pin it so large OSRM/Overpass
+    # responses always arrive compressed even if defaults change.
+    'Accept-Encoding': 'gzip, deflate',
+})
+_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16,
+                       max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]))
+SESSION.mount('https://', _adapter)
+SESSION.mount('http://', _adapter)
+
+# (connect, read) timeouts so a slow upstream doesn't block reruns indefinitely
+REQUEST_TIMEOUT = (3, 15)
+
+# On-disk cache backing the in-memory st.cache_data layer, so geocoding and
+# route results survive Streamlit restarts and redeployments.
+CACHE = diskcache.Cache('./.geocache', size_limit=2**30)
+
 # Initialize session state for all variables
 if 'routes' not in st.session_state:
     st.session_state.routes = []
@@ -20,69 +55,273 @@ if 'destinations' not in st.session_state:
     st.session_state.destinations = []
 
 
-def get_coords(place_name):
-    """Geocode a place name to coordinates using Nominatim."""
-    if not place_name: return None, None
+@st.cache_resource
+def load_config():
+    """Parse config.ini once per process and flatten it into a plain dict.
+
+    Values are typed and fallbacks applied up front, so hot paths like
+    create_map do plain dict lookups instead of ConfigParser.get calls on
+    every rerun.
+    """
+    parser = configparser.ConfigParser()
     try:
-        url = f"https://nominatim.openstreetmap.org/search?q={place_name}&format=json"
-        headers = {'User-Agent': 'Aisin-Internship-CarNavApp/1.0 (anothay555@gmail.com)'}
-        response = requests.get(url, headers=headers)
+        parser.read('config.ini')
+    except configparser.Error:
+        st.warning("config.ini file not found or contains errors. Using default values.")
+    return {
+        'start_place': parser.get('Defaults', 'start_place', fallback="Tokyo Station"),
+        'end_place': parser.get('Defaults', 'end_place', fallback="Shibuya Crossing"),
+        'start_lat': parser.getfloat('Defaults', 'start_lat', fallback=35.6812),
+        'start_lon': parser.getfloat('Defaults', 'start_lon', fallback=139.7671),
+        'end_lat': parser.getfloat('Defaults', 'end_lat', fallback=35.6595),
+        'end_lon': parser.getfloat('Defaults', 'end_lon', fallback=139.7005),
+        'zoom_start': parser.getint('Map', 'zoom_start', fallback=10),
+        'route_color': parser.get('Route', 'color', fallback='blue'),
+        'route_weight': parser.getint('Route', 'weight', fallback=6),
+        'fuel_efficiency_km_l': parser.getfloat('Vehicle', 'fuel_efficiency_km_l', fallback=15.0),
+        'fuel_price_yen_l': parser.getfloat('Vehicle', 'fuel_price_yen_l', fallback=175.0),
+    }
+
+def decode_polyline(encoded, precision=5):
+    """Decode an encoded polyline string into a list of (lat, lon) tuples.
+
+    Vectorized NumPy port of the standard polyline algorithm: the string is
+    processed as a uint8 array so chunk merging, ZigZag decoding and delta
+    accumulation run as C loops instead of a per-character Python loop.
+    """
+    if not encoded:
+        return []
+    vals = np.frombuffer(encoded.encode('ascii'), dtype=np.uint8).astype(np.int64) - 63
+    chunks = vals & 0x1F
+    # Characters without the 0x20 continuation bit terminate a value
+    last = (vals & 0x20) == 0
+    group = np.zeros(len(vals), dtype=np.int64)
+    group[1:] = np.cumsum(last[:-1])
+    ends = np.flatnonzero(last)
+    first_of_group = np.concatenate(([0], ends[:-1] + 1))
+    # Merge each value's 5-bit chunks at their bit offsets
+    shifts = 5 * (np.arange(len(vals)) - first_of_group[group])
+    values = np.zeros(len(ends), dtype=np.int64)
+    np.bitwise_or.at(values, group, chunks << shifts)
+    # ZigZag decode, then integrate the interleaved (lat, lon) deltas
+    values = np.where(values & 1, ~(values >> 1), values >> 1)
+    coords = np.cumsum(values.reshape(-1, 2), axis=0) / (10.0 ** precision)
+    return [tuple(c) for c in coords.tolist()]
+
+async def _geocode_all(place_names):
+    """Geocode normalized place names concurrently over one HTTP/2 connection.
+
+    Nominatim's 1 request/second policy is enforced by an asyncio lock and
+    monotonic clock shared by all tasks in the batch, so requests are spaced
+    out while connection setup and response reads still overlap.
+    """
+    lock = asyncio.Lock()
+    last_call = 0.0
+
+    async def throttle():
+        nonlocal last_call
+        async with lock:
+            wait = last_call + 1.0 - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            last_call = time.monotonic()
+
+    async def one(client, place_name):
+        if not place_name:
+            return None, None
+        cache_key = ('geocode', place_name)
+        cached = CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+        await throttle()
+        response = await client.get(NOMINATIM_URL, params={'q': place_name, 'format': 'json'})
         response.raise_for_status()
-        data = response.json()
-        if data:
-            return float(data[0]['lat']), float(data[0]['lon'])
-    except requests.exceptions.RequestException as e:
+        data = orjson.loads(response.content)
+        try:
+            coords = float(data[0]['lat']), float(data[0]['lon'])
+        except (KeyError, IndexError):
+            return None, None
+        CACHE.set(cache_key, coords, expire=30 * 86400)
+        return coords
+
+    async with httpx.AsyncClient(http2=True, timeout=15, headers={'User-Agent': USER_AGENT}) as client:
+        return await asyncio.gather(*(one(client, name) for name in place_names))
+
+@st.cache_data(show_spinner=False, ttl=86400)
+def _geocode_batch(names_key):
+    """Run the async geocode fan-out for a tuple of normalized names (cached for a day)."""
+    return asyncio.run(_geocode_all(names_key))
+
+def geocode_places(place_names):
+    """Geocode several place names concurrently, preserving input order.
+
+    Unmatched names come back as (None, None); transport errors raise out of
+    the cached batch so failures are reported but never cached.
+    """
+    # Normalize so "Tokyo Station" and " tokyo station " hit the same cache entry
+    normalized = tuple((name or '').strip().lower() for name in place_names)
+    try:
+        return _geocode_batch(normalized)
+    except httpx.HTTPError as e:
         st.error(f"Error calling Nominatim API: {e}")
-    except (KeyError, IndexError):
-        st.error(f"Could not find coordinates for '{place_name}'. Please try a different name.")
-    return None, None
-
-def get_route(coords_list, alternatives=False):
+        return [(None, None)] * len(normalized)
+
+@CACHE.memoize(expire=7 * 86400)
+def _fetch_routes_raw(coords_key, alternatives, overview, steps):
+    """Fetch routes from OSRM for a tuple of rounded (lon, lat) pairs.
+
+    Disk-cached only (no st.* calls), so it is safe to invoke from the
+    background prewarm thread as well as the script thread.
+    """
+    # Format coordinates into a semicolon-separated string of lon,lat
+    coords_str = ";".join([f"{lon},{lat}" for lon, lat in coords_key])
+    url = f"http://router.project-osrm.org/route/v1/driving/{coords_str}?overview={overview}&steps={str(steps).lower()}&alternatives={str(alternatives).lower()}"
+    response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return orjson.loads(response.content)['routes']
+
+@st.cache_data(show_spinner=False, ttl=3600)
+def _fetch_routes(coords_key, alternatives, overview, steps):
+    """In-memory caching layer over _fetch_routes_raw for warm in-process hits."""
+    return _fetch_routes_raw(coords_key, alternatives, overview, steps)
+
+def get_route(coords_list, alternatives=False, overview='full', steps=True):
     """Get one or more routes from OSRM for a list of coordinates."""
     try:
-        # Format coordinates into a semicolon-separated string of lon,lat
-        coords_str = ";".join([f"{lon},{lat}" for lon, lat in coords_list])
-        url = f"http://router.project-osrm.org/route/v1/driving/{coords_str}?overview=full&steps=true&alternatives={str(alternatives).lower()}"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        if data.get('routes'):
-            return data['routes']
+        # Round to ~1m precision so trivially different inputs share a cache entry
+        coords_key = tuple((round(lon, 5), round(lat, 5)) for lon, lat in coords_list)
+        routes = _fetch_routes(coords_key, alternatives, overview, steps)
+        if routes:
+            return routes
     except requests.exceptions.RequestException as e:
         st.error(f"Error calling OSRM API: {e}")
     except (KeyError, IndexError):
         st.error("Could not find a route. Please check the coordinates.")
     return None
 
-def get_fuel_stations_along_route(route_geometry, radius_meters=5000):
+def _downsample_by_distance(points, max_points):
+    """Pick at most max_points route points spaced evenly by arc length.
+
+    Index striding over-samples dense urban segments and under-samples long
+    straight ones; spacing by accumulated haversine distance keeps the query
+    points evenly spread in real meters along the route.
+    """
+    if len(points) <= max_points:
+        return points
+    rad = np.radians(np.asarray(points))
+    lat, lon = rad[:, 0], rad[:, 1]
+    dlat, dlon = np.diff(lat), np.diff(lon)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlon / 2) ** 2
+    segments = 2 * 6371000.0 * np.arcsin(np.sqrt(a))
+    distance = np.concatenate(([0.0], np.cumsum(segments)))
+    targets = np.linspace(0.0, distance[-1], max_points)
+    indices = np.unique(np.searchsorted(distance, targets))
+    return [points[i] for i in indices]
+
+def _simplify_points(points, epsilon):
+    """Ramer-Douglas-Peucker polyline simplification (iterative, NumPy).
+
+    Drops every point whose perpendicular offset from the current chord is
+    within epsilon (in degrees), which cuts the serialized map payload for
+    long routes while staying visually identical at typical zoom levels.
+    """
+    pts = np.asarray(points, dtype=np.float64)
+    n = len(pts)
+    if n < 3:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = pts[start + 1:end] - pts[start]
+        chord = pts[end] - pts[start]
+        chord_len = np.hypot(chord[0], chord[1])
+        if chord_len == 0.0:
+            offsets = np.hypot(segment[:, 0], segment[:, 1])
+        else:
+            offsets = np.abs(chord[0] * segment[:, 1] - chord[1] * segment[:, 0]) / chord_len
+        farthest = int(np.argmax(offsets))
+        if offsets[farthest] > epsilon:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return [tuple(p) for p in pts[keep].tolist()]
+
+def _display_points(route, epsilon):
+    """Simplified copy of a route's points for drawing, memoized per epsilon.
+
+    The full polyline stays in route['_points'] for the fuel-station search;
+    only the visual copy handed to folium.PolyLine is simplified.
+    """
+    if route.get('_display_epsilon') != epsilon:
+        route['_display_points'] = _simplify_points(_route_points(route), epsilon)
+        route['_display_epsilon'] = epsilon
+    return route['_display_points']
+
+def _route_points(route):
+    """Return the decoded polyline for a route, decoding at most once per route.
+
+    Routes live in st.session_state, so the decoded points survive reruns and
+    every later widget interaction reuses them instead of re-decoding.
+    """
+    return route.setdefault('_points', decode_polyline(route['geometry']))
+
+@CACHE.memoize(expire=86400)
+def _fetch_fuel_stations(route_geometry, radius_meters):
+    """Query Overpass for fuel stations near an encoded route polyline.
+
+    Disk-cached per (geometry, radius) and free of st.* calls, so the
+    background prewarm thread can populate the cache before the user asks.
+    """
+    points = decode_polyline(route_geometry)
+    if not points:
+        return []
+
+    MAX_QUERY_POINTS = 50
+    points = _downsample_by_distance(points, MAX_QUERY_POINTS)
+
+    # Round to 4 decimals (~11 m) and drop duplicates: plenty of precision
+    # for a multi-km around radius, and a much shorter query body.
+    seen = set()
+    rounded = []
+    for lat, lon in points:
+        key = (round(lat, 4), round(lon, 4))
+        if key not in seen:
+            seen.add(key)
+            rounded.append(key)
+    points_str = ",".join([f"{lat},{lon}" for lat, lon in rounded])
+    overpass_url = "https://overpass-api.de/api/interpreter"
+    # A single nwr statement keeps one copy of the point list in the query
+    # body, so Overpass parses it and evaluates the around filter only once.
+    overpass_query = f"""
+    [out:json][timeout:60];
+    nwr["amenity"="fuel"](around:{radius_meters},{points_str});
+    out center;
+    """
+    # Strip template whitespace and gzip the form body; the coordinate
+    # list compresses well and Overpass accepts Content-Encoding: gzip.
+    overpass_query = " ".join(overpass_query.split())
+    body = gzip.compress(('data=' + urllib.parse.quote(overpass_query)).encode())
+    response = SESSION.post(overpass_url, data=body,
+                            headers={'Content-Encoding': 'gzip',
+                                     'Content-Type': 'application/x-www-form-urlencoded'},
+                            timeout=(3, 65))
+    response.raise_for_status()
+    return orjson.loads(response.content).get('elements', [])
+
+def get_fuel_stations_along_route(route, radius_meters=5000):
     """Get fuel stations within a certain radius of a route polyline using Overpass API."""
     try:
-        points = polyline.decode(route_geometry)
-        if not points:
+        if not route.get('geometry'):
             st.warning("Route geometry is empty, cannot search for fuel stations.")
             return []
-
-        MAX_QUERY_POINTS = 50
-        if len(points) > MAX_QUERY_POINTS:
-            step = len(points) // MAX_QUERY_POINTS
-            points = points[::step]
-
-        points_str = ", ".join([f"{p[0]}, {p[1]}" for p in points])
-        overpass_url = "https://overpass-api.de/api/interpreter"
-        overpass_query = f"""
-        [out:json][timeout:60];
-        (
-          node["amenity"="fuel"](around:{radius_meters}, {points_str});
-          way["amenity"="fuel"](around:{radius_meters}, {points_str});
-          relation["amenity"="fuel"](around:{radius_meters}, {points_str});
-        );
-        out center;
-        """
-        response = requests.post(overpass_url, data={'data': overpass_query}, timeout=65)
-        response.raise_for_status()
-        data = response.json()
-        st.info(f"Found {len(data.get('elements', []))} fuel stations within {radius_meters/1000}km of the route.")
-        return data.get('elements', [])
+        stations = _fetch_fuel_stations(route['geometry'], radius_meters)
+        st.info(f"Found {len(stations)} fuel stations within {radius_meters/1000}km of the route.")
+        return stations
 
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 504:
@@ -97,6 +336,48 @@ def get_fuel_stations_along_route(route_geometry, radius_meters=5000):
     return []
 
 
+def _prewarm_route_extras(coords_list, alternatives):
+    """Warm the detailed-route and fuel-station disk caches in the background.
+
+    Started right after the lightweight fetch, so by the time the user opens
+    the turn-by-turn table or toggles fuel stations (default 5 km radius) the
+    expensive OSRM/Overpass results are usually already on disk.
+    """
+    coords_key = tuple((round(lon, 5), round(lat, 5)) for lon, lat in coords_list)
+
+    def worker():
+        try:
+            routes = _fetch_routes_raw(coords_key, alternatives, 'full', True)
+            best = min(routes, key=lambda r: r.get('duration', float('inf')))
+            _fetch_fuel_stations(best['geometry'], 5000)
+        except requests.exceptions.RequestException:
+            pass  # best effort; the foreground call will surface errors
+
+    st.toast("Prefetching route details and fuel stations…")
+    threading.Thread(target=worker, daemon=True).start()
+
+def _ensure_detailed_routes():
+    """Upgrade the stored routes to the detailed fetch (full geometry + steps).
+
+    The initial fetch behind the route chooser is lightweight
+    (overview=simplified, steps=false); the expensive detailed payload is
+    pulled the first time the turn-by-turn table or the fuel search needs it
+    and then kept in st.session_state, so switching back is free.
+    """
+    if st.session_state.get('routes_detailed'):
+        return True
+    with st.spinner("Loading route details..."):
+        detailed = get_route(st.session_state.all_coords,
+                             st.session_state.get('routes_alternatives', False),
+                             overview='full', steps=True)
+    if not detailed:
+        return False
+    # Same sort as the lightweight fetch, so route indices stay aligned
+    detailed.sort(key=lambda r: r.get('duration', float('inf')))
+    st.session_state.routes = detailed
+    st.session_state.routes_detailed = True
+    return True
+
 def format_duration(seconds):
     """Format duration in seconds to a readable string (h m s)."""
     if not seconds: return "0s"
@@ -108,102 +389,151 @@ def format_duration(seconds):
     if seconds > 0 or not duration_str: duration_str += f"{int(seconds)}s"
     return duration_str.strip()
 
+def _format_durations(seconds):
+    """Vectorized format_duration for a sequence of durations in seconds.
+
+    Produces the same \"Xh Ym Zs\" strings as format_duration but via NumPy
+    divmod and char ops, so long step lists are formatted in a few C passes
+    instead of one Python call per step.
+    """
+    arr = np.asarray(seconds, dtype=np.float64)
+    minutes, secs = np.divmod(arr, 60)
+    hours, minutes = np.divmod(minutes, 60)
+    hours, minutes, secs = (x.astype(np.int64) for x in (hours, minutes, secs))
+    h_part = np.where(hours > 0, np.char.add(hours.astype(str), 'h '), '')
+    m_part = np.where(minutes > 0, np.char.add(minutes.astype(str), 'm '), '')
+    s_part = np.where((secs > 0) | ((hours == 0) & (minutes == 0)),
+                      np.char.add(secs.astype(str), 's'), '')
+    return np.char.strip(np.char.add(np.char.add(h_part, m_part), s_part)).tolist()
+
 def create_map(routes, coords_list, place_names, config, selected_index=0, fuel_stations=None):
     """Create a Folium map with waypoints and optional fuel station markers."""
     start_coords = coords_list[0]
     end_coords = coords_list[-1]
     map_center = [(start_coords[1] + end_coords[1]) / 2, (start_coords[0] + end_coords[0]) / 2]
-    m = folium.Map(location=map_center, zoom_start=int(config.get('Map', 'zoom_start', fallback=10)))
+    m = folium.Map(location=map_center, zoom_start=config['zoom_start'])
 
-    # Add marker for start point using the provided place name
-    folium.Marker(location=[start_coords[1], start_coords[0]], popup=place_names[0], icon=folium.Icon(color='green', icon='car', prefix='fa')).add_to(m)
-    # Add marker for end point using the provided place name
-    folium.Marker(location=[end_coords[1], end_coords[0]], popup=place_names[-1], icon=folium.Icon(color='red', icon='flag-checkered', prefix='fa')).add_to(m)
-    
-    # Add markers for intermediate destinations (waypoints) using their names
+    # Collect all waypoint markers into one FeatureGroup added to the map once
+    waypoints = folium.FeatureGroup(name="Waypoints")
+    # Marker for start point using the provided place name
+    waypoints.add_child(folium.Marker(location=[start_coords[1], start_coords[0]], popup=place_names[0], icon=folium.Icon(color='green', icon='car', prefix='fa')))
+    # Marker for end point using the provided place name
+    waypoints.add_child(folium.Marker(location=[end_coords[1], end_coords[0]], popup=place_names[-1], icon=folium.Icon(color='red', icon='flag-checkered', prefix='fa')))
+
+    # Markers for intermediate destinations (waypoints) using their names
     for i, (lon, lat) in enumerate(coords_list[1:-1]):
         popup_text = place_names[i + 1]
-        folium.Marker(location=[lat, lon], popup=popup_text, icon=folium.Icon(color='blue', icon='map-marker', prefix='fa')).add_to(m)
+        waypoints.add_child(folium.Marker(location=[lat, lon], popup=popup_text, icon=folium.Icon(color='blue', icon='map-marker', prefix='fa')))
+    m.add_child(waypoints)
 
+    # Tolerance halves per zoom level so closer default views simplify less
+    epsilon = 1e-4 * 2 ** (10 - config['zoom_start'])
     all_points = []
     for i, route in enumerate(routes):
         if route and 'geometry' in route:
-            route_points = polyline.decode(route['geometry'])
-            all_points.extend(route_points)
+            route_points = _route_points(route)
+            if route_points:
+                all_points.append(np.asarray(route_points))
             
             if i == selected_index:
-                line_options = {'color': config.get('Route', 'color', fallback='blue'), 'weight': config.getint('Route', 'weight', fallback=6), 'opacity': 0.9, 'popup': f"Selected Route: {format_duration(route.get('duration'))}"}
+                line_options = {'color': config['route_color'], 'weight': config['route_weight'], 'opacity': 0.9, 'popup': f"Selected Route: {format_duration(route.get('duration'))}"}
             else:
                 line_options = {'color': '#888888', 'weight': 5, 'opacity': 0.7, 'popup': f"Alternative: {format_duration(route.get('duration'))}"}
-            folium.PolyLine(locations=route_points, **line_options).add_to(m)
+            folium.PolyLine(locations=_display_points(route, epsilon), **line_options).add_to(m)
 
     if fuel_stations:
+        # FastMarkerCluster ships the stations as one JS data array and builds
+        # the markers client-side, instead of one HTML template per station.
+        station_rows = []
         for station in fuel_stations:
             lat = station.get('lat') or station.get('center', {}).get('lat')
             lon = station.get('lon') or station.get('center', {}).get('lon')
             if lat and lon:
-                name = station.get('tags', {}).get('name', 'Fuel Station')
-                folium.Marker(location=[lat, lon], popup=name, icon=folium.Icon(color='orange', icon='gas-pump', prefix='fa')).add_to(m)
+                station_rows.append([lat, lon, station.get('tags', {}).get('name', 'Fuel Station')])
+        if station_rows:
+            fuel_callback = """
+            function (row) {
+                var icon = L.AwesomeMarkers.icon({icon: 'gas-pump', prefix: 'fa', markerColor: 'orange'});
+                return L.marker(new L.LatLng(row[0], row[1]), {icon: icon}).bindPopup(row[2]);
+            }
+            """
+            FastMarkerCluster(data=station_rows, callback=fuel_callback, name="Fuel Stations").add_to(m)
 
     if all_points:
-        m.fit_bounds([[min(p[0] for p in all_points), min(p[1] for p in all_points)],
-                      [max(p[0] for p in all_points), max(p[1] for p in all_points)]])
+        # Single C pass per axis instead of four Python-level min/max sweeps
+        stacked = np.concatenate(all_points)
+        m.fit_bounds([stacked.min(axis=0).tolist(), stacked.max(axis=0).tolist()])
     
     return m
 
+@functools.lru_cache(maxsize=None)
+def _title(text):
+    """Cached '_'-to-space and title-casing for OSRM's small fixed vocabularies."""
+    return text.replace('_', ' ').title()
+
+def _default_instruction(maneuver, road_name):
+    parts = [_title(maneuver.get('type', 'unknown')), _title(maneuver.get('modifier', ''))]
+    if road_name:
+        parts.append(f"onto {road_name}")
+    return " ".join(part for part in parts if part)
+
+# Maneuver types with dedicated wording, keyed by OSRM's lowercase type
+# strings so the hot loop is one dict lookup per step instead of an if/elif
+# chain of repeated replace/title calls. 'arrive' depends on the leg position
+# and is handled inline in create_route_details_df.
+MANEUVER_FMT = {
+    'depart': lambda maneuver, road_name: f"Depart on {road_name}" if road_name else "Depart",
+    'new name': lambda maneuver, road_name: f"Continue onto {road_name}",
+}
+
 def create_route_details_df(route):
     """Creates a pandas DataFrame from the route legs and steps."""
-    route_details = []
+    # Build column-wise so pandas constructs each column directly from one
+    # list instead of inferring dtypes from a list of per-step dicts.
+    steps, instructions, distances, durations = [], [], [], []
     total_steps = 1
     for leg_index, leg in enumerate(route['legs']):
         for step in leg['steps']:
             maneuver = step.get('maneuver', {})
-            maneuver_type = maneuver.get('type', 'unknown').replace('_', ' ').title()
-            modifier = maneuver.get('modifier', '').replace('_', ' ').title()
+            maneuver_type = maneuver.get('type', 'unknown')
             road_name = step.get('name', '')
-            
-            final_instruction = ""
-            if maneuver_type == 'Depart':
-                final_instruction = f"Depart on {road_name}" if road_name else "Depart"
-            elif maneuver_type == 'New Name':
-                final_instruction = f"Continue onto {road_name}"
-            elif maneuver_type == 'Arrive' and leg_index < len(route['legs']) - 1:
-                final_instruction = f"You have arrived at Waypoint {leg_index + 1}."
-            elif maneuver_type == 'Arrive':
-                final_instruction = maneuver.get('instruction', "You have arrived at your final destination.")
+
+            if maneuver_type == 'arrive':
+                if leg_index < len(route['legs']) - 1:
+                    final_instruction = f"You have arrived at Waypoint {leg_index + 1}."
+                else:
+                    final_instruction = maneuver.get('instruction', "You have arrived at your final destination.")
             else:
-                instruction_parts = [maneuver_type, modifier]
-                if road_name:
-                    instruction_parts.append(f"onto {road_name}")
-                final_instruction = " ".join(part for part in instruction_parts if part)
-
-            route_details.append({
-                "Step": total_steps,
-                "Instruction": final_instruction,
-                "Distance (km)": f"{step['distance'] / 1000:.2f}",
-                "Time": format_duration(step['duration']),
-            })
+                final_instruction = MANEUVER_FMT.get(maneuver_type, _default_instruction)(maneuver, road_name)
+
+            steps.append(total_steps)
+            instructions.append(final_instruction)
+            distances.append(step['distance'] / 1000)
+            durations.append(step['duration'])
             total_steps += 1
-            
-    return pd.DataFrame(route_details)
+
+    # Distances stay numeric so the column sorts correctly; formatting is
+    # applied at display time.
+    return pd.DataFrame({
+        "Step": steps,
+        "Instruction": instructions,
+        "Distance (km)": distances,
+        "Time": _format_durations(durations) if durations else [],
+    })
 
 def main():
     """Main function to run the Streamlit app."""
     st.set_page_config(page_title="Car Navigation", layout="wide")
     st.title("Car Navigation System")
 
-    config = configparser.ConfigParser()
-    try:
-        config.read('config.ini')
-    except configparser.Error:
-        st.warning("config.ini file not found or contains errors. Using default values.")
+    config = load_config()
 
     # --- Sidebar Inputs ---
     st.sidebar.header("Navigation Input")
     input_method = st.sidebar.radio("Input Method:", ("Place Name", "Coordinates"), horizontal=True)
 
     if input_method == "Place Name":
-        start_place = st.sidebar.text_input("Start Location", config.get('Defaults', 'start_place', fallback="Tokyo Station"))
+        start_place = st.sidebar.text_input("Start Location", config['start_place'])
         
         # --- Waypoints UI ---
         st.sidebar.subheader("Waypoints")
@@ -245,7 +575,7 @@ def main():
                     st.session_state.show_add_destination_input = False
                     st.rerun()
 
-        end_place = st.sidebar.text_input("End Location", config.get('Defaults', 'end_place', fallback="Shibuya Crossing"))
+        end_place = st.sidebar.text_input("End Location", config['end_place'])
 
     else: # Coordinates - Waypoints not supported for coordinate input for simplicity
         start_place, end_place = None, None # Ensure these are None
@@ -253,12 +583,12 @@ def main():
         col1, col2 = st.sidebar.columns(2)
         with col1:
             st.write("Start")
-            start_lat = st.number_input("Lat", value=float(config.get('Defaults', 'start_lat', fallback=35.6812)), format="%.6f", key="start_lat")
-            start_lon = st.number_input("Lon", value=float(config.get('Defaults', 'start_lon', fallback=139.7671)), format="%.6f", key="start_lon")
+            start_lat = st.number_input("Lat", value=config['start_lat'], format="%.6f", key="start_lat")
+            start_lon = st.number_input("Lon", value=config['start_lon'], format="%.6f", key="start_lon")
         with col2:
             st.write("End")
-            end_lat = st.number_input("Lat", value=float(config.get('Defaults', 'end_lat', fallback=35.6595)), format="%.6f", key="end_lat")
-            end_lon = st.number_input("Lon", value=float(config.get('Defaults', 'end_lon', fallback=139.7005)), format="%.6f", key="end_lon")
+            end_lat = st.number_input("Lat", value=config['end_lat'], format="%.6f", key="end_lat")
+            end_lon = st.number_input("Lon", value=config['end_lon'], format="%.6f", key="end_lon")
 
     st.sidebar.header("Options")
     show_alternatives = st.sidebar.checkbox("Show alternative routes", value=True)
@@ -271,8 +601,8 @@ def main():
     col1, col2 = st.sidebar.columns(2)
     with col1: st.date_input("Departure Date", key='departure_date')
     with col2: st.time_input("Departure Time", key='departure_time')
-    fuel_efficiency = st.sidebar.number_input("Fuel Efficiency (km/L)", 1.0, value=float(config.get('Vehicle', 'fuel_efficiency_km_l', fallback=15.0)), step=0.1)
-    fuel_price = st.sidebar.number_input("Fuel Price (¥/L)", 100.0, value=float(config.get('Vehicle', 'fuel_price_yen_l', fallback=175.0)), step=1.0)
+    fuel_efficiency = st.sidebar.number_input("Fuel Efficiency (km/L)", 1.0, value=config['fuel_efficiency_km_l'], step=0.1)
+    fuel_price = st.sidebar.number_input("Fuel Price (¥/L)", 100.0, value=config['fuel_price_yen_l'], step=1.0)
 
     if st.sidebar.button("Get Route", use_container_width=True):
         all_coords = []
@@ -280,8 +610,7 @@ def main():
             places_to_geocode = [start_place] + st.session_state.destinations + [end_place]
             st.session_state.all_places = places_to_geocode # Save place names for map popups
             valid_trip = True
-            for place in places_to_geocode:
-                lat, lon = get_coords(place)
+            for place, (lat, lon) in zip(places_to_geocode, geocode_places(places_to_geocode)):
                 if lat is not None and lon is not None:
                     all_coords.append((lon, lat))
                 else:
@@ -295,12 +624,18 @@ def main():
 
         if len(all_coords) >= 2:
             with st.spinner("Calculating routes..."):
-                routes = get_route(all_coords, show_alternatives)
+                # Lightweight fetch for the route chooser; the detailed
+                # payload (full geometry + steps) is fetched lazily by
+                # _ensure_detailed_routes when something needs it.
+                routes = get_route(all_coords, show_alternatives, overview='simplified', steps=False)
                 if routes:
                     routes.sort(key=lambda r: r.get('duration', float('inf')))
                     st.session_state.routes = routes
+                    st.session_state.routes_detailed = False
+                    st.session_state.routes_alternatives = show_alternatives
                     st.session_state.selected_route_index = 0
                     st.session_state.all_coords = all_coords # Save coords for map
+                    _prewarm_route_extras(all_coords, show_alternatives)
                 else:
                     st.session_state.routes = []
                     st.error("No routes found. Please check your locations.")
@@ -342,16 +677,34 @@ def main():
 
         st.subheader("Navigation Map")
         fuel_stations_data = []
-        if show_fuel:
+        if show_fuel and _ensure_detailed_routes():
+            routes = st.session_state.routes
+            selected_route = routes[st.session_state.selected_route_index]
             with st.spinner("Searching for fuel stations near your route..."):
-                fuel_stations_data = get_fuel_stations_along_route(selected_route['geometry'], radius_meters=fuel_search_radius_km * 1000)
-
-        folium_map = create_map(routes, all_coords, all_places, config, st.session_state.selected_route_index, fuel_stations=fuel_stations_data)
-        folium_static(folium_map, width=1200, height=500)
+                fuel_stations_data = get_fuel_stations_along_route(selected_route, radius_meters=fuel_search_radius_km * 1000)
+
+        # The map only depends on these inputs; reuse the rendered HTML from
+        # session state when none of them changed, so unrelated widget
+        # interactions (dates, sliders) don't rebuild thousands of points.
+        map_key = (
+            st.session_state.selected_route_index,
+            show_fuel,
+            fuel_search_radius_km,
+            tuple(r['geometry'] for r in routes if 'geometry' in r),
+            tuple(all_coords),
+        )
+        if st.session_state.get('map_key') != map_key:
+            folium_map = create_map(routes, all_coords, all_places, config, st.session_state.selected_route_index, fuel_stations=fuel_stations_data)
+            st.session_state.map_html = folium_map.get_root().render()
+            st.session_state.map_key = map_key
+        components.html(st.session_state.map_html, width=1200, height=500)
 
         st.subheader("Route Details")
-        df = create_route_details_df(selected_route)
-        st.dataframe(df, use_container_width=True, hide_index=True)
+        if st.toggle("Show turn-by-turn instructions") and _ensure_detailed_routes():
+            selected_route = st.session_state.routes[st.session_state.selected_route_index]
+            df = create_route_details_df(selected_route)
+            st.dataframe(df, use_container_width=True, hide_index=True,
+                         column_config={"Distance (km)": st.column_config.NumberColumn(format="%.2f")})
 
 if __name__ == "__main__":
     main()